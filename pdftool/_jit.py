@@ -0,0 +1,25 @@
+"""
+Optional Numba-compiled kernels.
+Importing this module raises ImportError when numba (or numpy) is not installed.
+"""
+
+import numba
+import numpy as np
+
+from pdftool.fonts import WIDTHS
+
+# Glyph width tables as arrays the compiled kernels can index directly
+WIDTH_ARRAYS = {
+    font: np.array(widths, dtype=np.int16) for font, widths in WIDTHS.items()
+}
+
+
+@numba.njit(cache=True, nogil=True)
+def string_width(codes: np.ndarray, widths: np.ndarray) -> int:
+    """
+    Sums the glyph widths (in 1/1000 em) of the character codes in codes.
+    """
+    total = 0
+    for code in codes:
+        total += widths[code]
+    return total
@@ -1,20 +1,74 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import typer
+from enum import StrEnum  # python 3.11+
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
+from functools import lru_cache, partial
 from importlib.resources import files
+from itertools import chain, islice
 from pathlib import Path
-import pikepdf
 from datetime import datetime
-from rich.console import Console
 
-from pdftool.watermark import add_watermark, AllowedFonts
+# Heavy modules (pikepdf, rich, pdftool.watermark, ...) are imported inside the
+# functions that use them so commands like `license` and `help` start quickly.
+from pdftool.fonts import AllowedFonts
 
 app = typer.Typer(help="pdftool: A versatile PDF processing tool.")
 
-console = Console()
+_console = None
 
 # Author and year details
 AUTHOR = "Travis L. Seymour, PhD."
 YEAR = datetime.now().year
 
+# Default number of worker processes for folder-mode batch processing
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+
+# Number of files handed to the workers at a time in folder mode
+CHUNK_SIZE = 1000
+
+
+class ShrinkLevel(StrEnum):
+    minimal = "minimal"  # linearize only; existing streams are left as they are
+    balanced = "balanced"  # linearize and recompress Flate streams
+    max = "max"  # also generate object streams and recompress decodable streams
+
+
+def get_console():
+    """
+    Returns the shared rich Console, creating it on first use.
+    """
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+def save_options(level: ShrinkLevel) -> dict:
+    """
+    Returns the pikepdf save options used for the given shrink level.
+    """
+    import pikepdf
+
+    if level == ShrinkLevel.minimal:
+        return dict(linearize=True)
+    if level == ShrinkLevel.balanced:
+        return dict(linearize=True, recompress_flate=True)
+    return dict(
+        linearize=True,
+        recompress_flate=True,
+        compress_streams=True,
+        stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+        object_stream_mode=pikepdf.ObjectStreamMode.generate,
+    )
+
 
 def print_startup_message():
     """
@@ -29,43 +83,527 @@ def print_startup_message():
     typer.echo(message)
 
 
-def shrink_pdf(input_path: Path, output_path: Path):
+def _save_to_temp(pdf, output_path: Path, **save_kwargs) -> Path:
+    """
+    Saves pdf to a uniquely named temporary file in output_path's folder and
+    returns its path, so the output can later be renamed into place atomically.
+    """
+    with tempfile.NamedTemporaryFile(
+        dir=output_path.parent,
+        prefix=f".{output_path.stem}_",
+        suffix=".tmp",
+        delete=False,
+    ) as tf:
+        temp_path = Path(tf.name)
+    try:
+        pdf.save(temp_path, **save_kwargs)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path
+
+
+def _replace_output(
+    temp_path: Path | None,
+    input_path: Path,
+    output_path: Path,
+    keep_if_larger: bool = False,
+) -> None:
+    """
+    Renames temp_path over output_path (with input_path's permissions), so a
+    failed run never leaves a truncated output or a clobbered original. With
+    keep_if_larger, or when temp_path is None, the input is kept instead: left
+    as-is when overwriting, otherwise copied to output_path.
+    Call it only after the input PDF has been closed.
+    """
+    try:
+        if temp_path is not None and (
+            not keep_if_larger or temp_path.stat().st_size < input_path.stat().st_size
+        ):
+            shutil.copymode(input_path, temp_path)
+            os.replace(temp_path, output_path)
+        elif output_path != input_path:
+            shutil.copyfile(input_path, output_path)
+    finally:
+        if temp_path is not None:
+            temp_path.unlink(missing_ok=True)
+
+
+def _is_well_compressed(pdf) -> bool:
+    """
+    Checks whether every stream in pdf, apart from images and XMP metadata (which
+    use their own encodings), is already Flate-compressed.
+    """
+    import pikepdf
+
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Stream):
+            continue
+        if obj.get("/Subtype") == pikepdf.Name.Image:
+            continue
+        if obj.get("/Type") == pikepdf.Name.Metadata:
+            continue
+        filters = obj.get("/Filter")
+        if isinstance(filters, pikepdf.Array):
+            filters = filters[0] if len(filters) == 1 else None
+        if filters != pikepdf.Name.FlateDecode:
+            return False
+    return True
+
+
+def shrink_pdf(
+    input_path: Path, output_path: Path, level: ShrinkLevel = ShrinkLevel.max
+):
     """
     Cleans and shrinks a PDF using pikepdf.
+    Inputs that are already linearized and compressed are not rewritten, and if the
+    result would be larger than the input, the input is kept as-is.
+    """
+    import pikepdf
+    from pdftool.saving import fast_save_options
+
+    temp_path = None
+    try:
+        with pikepdf.open(input_path) as pdf:
+            if not (pdf.is_linearized and _is_well_compressed(pdf)):
+                temp_path = _save_to_temp(
+                    pdf, output_path, **save_options(level), **fast_save_options(pdf)
+                )
+    except pikepdf.PdfError as e:
+        raise RuntimeError(
+            get_console().render_str(f"pikepdf failed to process pdf: {e}")
+        )
+
+    _replace_output(temp_path, input_path, output_path, keep_if_larger=True)
+
+
+def _replace_references(container, remap: dict) -> None:
+    """
+    Points every reference in container (and in its direct sub-dictionaries and
+    arrays) to a stream listed in remap at that stream's replacement instead.
+    """
+    import pikepdf
+
+    if isinstance(container, pikepdf.Array):
+        items = enumerate(list(container))
+    else:
+        items = [(key, container[key]) for key in container.keys()]
+
+    for key, value in items:
+        if not isinstance(value, pikepdf.Object):
+            continue  # scalars come back as plain Python values
+        if value.is_indirect:
+            if value.objgen in remap:
+                container[key] = remap[value.objgen]
+        elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+            _replace_references(value, remap)
+
+
+def _stream_dict_key(stream) -> bytes:
+    """
+    Serializes a stream's dictionary for duplicate detection. /Length is left out,
+    since it may be an indirect reference that differs between identical streams.
+    """
+    import pikepdf
+
+    return pikepdf.Dictionary(
+        {key: value for key, value in stream.stream_dict.items() if key != "/Length"}
+    ).unparse()
+
+
+def _dedupe_streams(pdf) -> int:
+    """
+    Collapses streams with identical data and dictionaries into a single object,
+    like Ghostscript's DetectDuplicateImages, and returns how many were dropped.
+    Duplicates become unreferenced and are left out when the PDF is saved.
+
+    Dictionaries can refer to other streams (an image's /SMask, a form's
+    /Resources, ...), so identical streams only hash equal once their referents
+    have been collapsed. Passes are repeated until no new duplicates are found.
+    """
+    import pikepdf
+
+    data_digests = {}  # raw stream data only changes by hashing, so hash it once
+    remap = {}
+    while True:
+        first_by_digest = {}
+        new_remap = {}
+        for obj in pdf.objects:
+            if not isinstance(obj, pikepdf.Stream) or obj.objgen in remap:
+                continue
+            if obj.objgen not in data_digests:
+                data_digests[obj.objgen] = hashlib.blake2b(
+                    obj.read_raw_bytes(), digest_size=16
+                ).digest()
+            digest = hashlib.blake2b(data_digests[obj.objgen], digest_size=16)
+            digest.update(_stream_dict_key(obj))
+            first = first_by_digest.setdefault(digest.digest(), obj)
+            if first.objgen != obj.objgen:
+                new_remap[obj.objgen] = first
+
+        if not new_remap:
+            return len(remap)
+
+        remap.update(new_remap)
+        for obj in pdf.objects:
+            if isinstance(obj, (pikepdf.Dictionary, pikepdf.Array)):
+                _replace_references(obj, new_remap)
+            elif isinstance(obj, pikepdf.Stream):
+                _replace_references(obj.stream_dict, new_remap)
+
+
+def merge_and_shrink_pdfs(
+    pdf_files: Iterable[Path],
+    output_path: Path,
+    level: ShrinkLevel = ShrinkLevel.max,
+) -> int:
+    """
+    Merges the pages of pdf_files into one PDF, collapses streams (images, fonts,
+    forms) duplicated across the documents, and saves it shrunken to output_path.
+    Only pages are merged; outlines and forms of the inputs are not kept.
+    Returns the number of duplicate streams removed.
+    """
+    import pikepdf
+    from pdftool.saving import fast_save_options
+
+    with ExitStack() as stack:
+        merged = stack.enter_context(pikepdf.Pdf.new())
+        try:
+            for pdf_file in pdf_files:
+                # Sources must stay open until the merged PDF is saved
+                source = stack.enter_context(pikepdf.open(pdf_file))
+                merged.pages.extend(source.pages)
+            removed = _dedupe_streams(merged)
+            merged.save(output_path, **save_options(level), **fast_save_options(merged))
+        except pikepdf.PdfError as e:
+            raise RuntimeError(
+                get_console().render_str(f"pikepdf failed to process pdf: {e}")
+            )
+    return removed
+
+
+def qpdf_shrink_pdf(input_path: Path, output_path: Path):
+    """
+    Cleans and shrinks a PDF by running the qpdf command-line tool directly,
+    skipping the construction of pikepdf's Python object model.
+    Raises FileNotFoundError if qpdf is not installed and
+    subprocess.CalledProcessError if qpdf fails. Exit status 3 (success with
+    warnings, e.g. for slightly damaged inputs) counts as success, because qpdf
+    has already written the output by then.
+    """
+    command = [
+        "qpdf",
+        "--linearize",
+        "--object-streams=generate",
+        "--compress-streams=y",
+        "--recompress-flate",
+        "--compression-level=9",
+        str(input_path),
+    ]
+    if input_path == output_path:
+        command.append("--replace-input")
+    else:
+        command.append(str(output_path))
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode not in (0, 3):
+        raise subprocess.CalledProcessError(
+            result.returncode, command, result.stdout, result.stderr
+        )
+
+
+def _shrink_one(
+    input_path: Path,
+    overwrite: bool,
+    fast: bool = False,
+    level: ShrinkLevel = ShrinkLevel.max,
+) -> Path:
+    """
+    Shrinks a single PDF and returns the path of the output file.
+    """
+    output_path = (
+        input_path if overwrite else input_path.with_stem(input_path.stem + "_shrunken")
+    )
+    if fast:
+        try:
+            qpdf_shrink_pdf(input_path, output_path)
+            return output_path
+        except FileNotFoundError:
+            pass  # qpdf is not installed; the shrink command has already said so
+        except subprocess.CalledProcessError:
+            typer.echo(
+                f"qpdf failed on {input_path}; falling back to pikepdf.", err=True
+            )
+    shrink_pdf(input_path, output_path, level)
+    return output_path
+
+
+def _watermark_many(
+    pdf_files: list[Path], watermark_text: str, **kwargs
+) -> Iterator[tuple[Path, bool, object]]:
+    """
+    Watermarks a batch of PDFs, yielding (pdf_file, ok, value) triples.
+    """
+    from pdftool.watermark import add_watermark_batch
+
+    pending = iter(pdf_files)
+    current = None
+
+    def track():
+        nonlocal current
+        for current in pending:
+            yield current
+
+    # A failure ends the batch generator, so restart it on the files still pending
+    while True:
+        try:
+            for pdf_file, output_file in add_watermark_batch(
+                track(), watermark_text=watermark_text, **kwargs
+            ):
+                yield pdf_file, True, output_file
+            return
+        except Exception as e:
+            yield current, False, str(e)
+
+
+def _grouped_by_page_size(pdf_files: Iterable[Path]) -> Iterator[Path]:
+    """
+    Reorders each CHUNK_SIZE chunk of pdf_files so that files with the same page
+    size are adjacent, letting each worker's slice reuse one watermark overlay.
     """
+    from pdftool.watermark import group_by_page_size
+
+    for batch in _chunks(pdf_files):
+        for group in group_by_page_size(batch).values():
+            yield from group
+
+
+def _each(func, pdf_files: list[Path]) -> Iterator[tuple[Path, bool, object]]:
+    """
+    Adapts a per-file function to the batch interface used by _run_batch,
+    turning exceptions into failed results.
+    """
+    for pdf_file in pdf_files:
+        try:
+            yield pdf_file, True, func(pdf_file)
+        except Exception as e:
+            yield pdf_file, False, str(e)
+
+
+def _collect(batch_func, pdf_files: list[Path]) -> list[tuple[Path, bool, object]]:
+    """
+    Runs batch_func over pdf_files in a worker process and returns all its results.
+    """
+    return list(batch_func(pdf_files))
+
+
+def _chunks(it: Iterable, n: int = CHUNK_SIZE) -> Iterator[list]:
+    """
+    Splits an iterable into lists of at most n items.
+    """
+    it = iter(it)
+    while batch := list(islice(it, n)):
+        yield batch
+
+
+def _process_one(
+    target_pdf: Path,
+    overwrite: bool,
+    watermark_text: str | None,
+    shrink: bool,
+    level: ShrinkLevel,
+    **watermark_options,
+) -> Path | None:
+    """
+    Watermarks and/or shrinks a single PDF and returns the output file (None if skipped).
+    """
+    import pikepdf
+    from pdftool.saving import fast_save_options
+    from pdftool.watermark import apply_watermark, is_watermarked
+
+    if watermark_text is not None and is_watermarked(target_pdf):
+        return None
+
+    suffix = ("_watermarked" if watermark_text is not None else "") + (
+        "_shrunken" if shrink else ""
+    )
+    output_path = (
+        target_pdf if overwrite else target_pdf.with_stem(target_pdf.stem + suffix)
+    )
+
+    # Without a watermark this is a plain shrink, so the same shortcuts apply:
+    # already-optimized inputs are not rewritten and larger results are dropped
+    shrink_only = shrink and watermark_text is None
+
+    temp_path = None
     try:
-        with pikepdf.open(input_path, allow_overwriting_input=True) as pdf:
-            pdf.save(output_path, linearize=True, recompress_flate=True)
+        with pikepdf.open(target_pdf) as pdf:
+            if watermark_text is not None:
+                apply_watermark(pdf, watermark_text, **watermark_options)
+            if not (shrink_only and pdf.is_linearized and _is_well_compressed(pdf)):
+                temp_path = _save_to_temp(
+                    pdf,
+                    output_path,
+                    **(save_options(level) if shrink else {}),
+                    **fast_save_options(pdf),
+                )
     except pikepdf.PdfError as e:
-        raise RuntimeError(console.render_str(f"pikepdf failed to process pdf: {e}"))
+        raise RuntimeError(
+            get_console().render_str(f"pikepdf failed to process pdf: {e}")
+        )
+
+    _replace_output(temp_path, target_pdf, output_path, keep_if_larger=shrink_only)
+    return output_path
+
+
+def _iter_pdfs(root: Path) -> Iterator[Path]:
+    """
+    Yields the PDF files directly inside root, matching the .pdf extension
+    case-insensitively. Uses os.scandir so no extra stat() is needed per entry.
+    The listing is read before yielding so that output files written next to
+    the inputs while the caller works are not picked up.
+    """
+    with os.scandir(root) as it:
+        pdf_paths = [
+            entry.path
+            for entry in it
+            if entry.is_file() and entry.name.lower().endswith(".pdf")
+        ]
+    for pdf_path in pdf_paths:
+        yield Path(pdf_path)
+
+
+# The functions passed to _run_batch must live at module level so they can be
+# pickled for the worker processes.
+def _run_batch(
+    func,
+    pdf_files: Iterable[Path],
+    workers: int,
+    description: str,
+    batched: bool = False,
+):
+    """
+    Applies func to every file in pdf_files, yielding (pdf_file, ok, value) triples
+    in completion order, where value is func's result or, if ok is False, the
+    error message. Files are processed in chunks of CHUNK_SIZE so that the
+    number of paths and pending futures held at once stays bounded, and a
+    progress bar is shown while they run. Uses a process pool when more than
+    one worker is requested.
+
+    If batched is True, func takes a list of files and yields (pdf_file, ok, value)
+    triples itself, so per-batch setup is shared; each worker then receives a slice
+    of the chunk instead of a single file.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from rich.progress import Progress
+
+    batch_func = func if batched else partial(_each, func)
+
+    with Progress(console=get_console(), transient=True) as progress:
+        task = progress.add_task(description, total=0)
+
+        if workers <= 1:
+            for batch in _chunks(pdf_files):
+                progress.update(task, total=progress.tasks[task].total + len(batch))
+                for result in batch_func(batch):
+                    yield result
+                    progress.advance(task)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in _chunks(pdf_files):
+                progress.update(task, total=progress.tasks[task].total + len(batch))
+                # Several slices per worker keeps the load balanced across workers
+                slice_size = -(-len(batch) // (workers * 4)) if batched else 1
+                futures = [
+                    executor.submit(_collect, batch_func, batch[i : i + slice_size])
+                    for i in range(0, len(batch), slice_size)
+                ]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        yield result
+                        progress.advance(task)
+
+
+# Reported for files a command skipped (results whose value is None)
+SKIPPED_WATERMARKED = "The file '{}' appears to already be watermarked. Skipped."
+
+
+def _report(
+    results: Iterable[tuple[Path, bool, object]],
+    message: str,
+    skipped_message: str = "Skipped {}.",
+):
+    """
+    Writes message (formatted with each output file) for every successful result,
+    and skipped_message (formatted with the input file name) for skipped ones.
+    Lines are buffered and written once per CHUNK_SIZE files, since each write
+    goes through rich while the progress bar is shown. Failures are summarised
+    on stderr at the end, and the command exits with an error if there were any.
+    """
+    lines = []
+    failures = []
+    for pdf_file, ok, value in results:
+        if not ok:
+            # pikepdf's messages usually name the file already
+            failures.append(value if str(pdf_file) in value else f"{pdf_file}: {value}")
+            continue
+        if value is None:
+            lines.append(skipped_message.format(pdf_file.name))
+        else:
+            lines.append(message.format(value))
+        if len(lines) >= CHUNK_SIZE:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+            lines.clear()
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    if failures:
+        typer.echo(
+            get_console().render_str(
+                f"[red]Failed to process {len(failures)} PDF file(s):[/red]"
+            ),
+            err=True,
+        )
+        typer.echo("\n".join(failures), err=True)
+        raise typer.Exit(1)
+
+
+@lru_cache(maxsize=2)
+def _license_text(which: str) -> str:
+    """
+    Reads (once per process) a license file bundled in pdftool.resources.text.
+    """
+    # Use the package directory to locate the license file
+    return files("pdftool.resources.text").joinpath(which).read_text()
 
 
 @app.command("license")
 def show_license():
     """
-    Prints the full license text from the LICENSE file.
+    Prints the license overview from the LICENSE file.
     """
-    # Use the package directory to locate the LICENSE file
     try:
-        license_file = files("pdftool.resources.text").joinpath("LICENSE")
-        typer.echo(license_file.read_text())
+        typer.echo(_license_text("LICENSE"))
     except FileNotFoundError:
-        typer.echo(console.render_str("[red]LICENSE file not found.[/red]"), err=True)
+        typer.echo(
+            get_console().render_str("[red]LICENSE file not found.[/red]"), err=True
+        )
         raise typer.Exit(1)
 
 
 @app.command("full_license")
-def show_license():
+def show_full_license():
     """
-    Prints the full license text from the LICENSE file.
+    Prints the full license text from the LICENSE_FULL file.
     """
-    # Use the package directory to locate the LICENSE file
     try:
-        license_file = files("pdftool.resources.text").joinpath("LICENSE_FULL")
-        typer.echo(license_file.read_text())
+        typer.echo(_license_text("LICENSE_FULL"))
     except FileNotFoundError:
         typer.echo(
-            console.render_str("[red]LICENSE_FULL file not found.[/red]"), err=True
+            get_console().render_str("[red]LICENSE_FULL file not found.[/red]"),
+            err=True,
         )
         raise typer.Exit(1)
 
@@ -81,6 +619,8 @@ def show_help():
     Available commands:
       - shrink [FILE_OR_FOLDER]: Shrink a PDF file or all PDFs in a folder.
       - watermark [FILE_OR_FOLDER TEXT]: Add a watermark to a PDF file or all PDFs in a folder.
+      - process [FILE_OR_FOLDER]: Watermark and/or shrink PDFs in a single pass.
+      - shrink-merged [FOLDER]: Merge all PDFs in a folder into one shrunken PDF.
       - license: Print the contents of the LICENSE file.
       - full_license: Print the contents of the LICENSE_FULL file.
       - help: Display this help message.
@@ -89,11 +629,20 @@ def show_help():
       pdftool shrink my_file.pdf
       pdftool shrink /path/to/folder
       pdftool shrink /path/to/folder --overwrite
+      pdftool shrink /path/to/folder --workers 8
+      pdftool shrink /path/to/folder --fast
+      pdftool shrink my_file.pdf --level balanced
+
+      pdftool shrink-merged /path/to/folder
+      pdftool shrink-merged /path/to/folder --output combined.pdf
 
       pdftool watermark my_file.pdf "Confidential" --rotation 45 --gray 0.5 --alpha 0.5
       pdftool watermark /path/to/folder "Copyright (c) 2024 The Author, PhD" --font "Times-Roman" --fontsize 50
       pdftool watermark my_file.pdf "Confidential" --overwrite
 
+      pdftool process my_file.pdf --watermark "Confidential" --shrink
+      pdftool process /path/to/folder --watermark "Confidential" --shrink --overwrite
+
       pdftool license
       pdftool full_license
     """
@@ -108,45 +657,71 @@ def shrink(
     overwrite: bool = typer.Option(
         False, "--overwrite", help="Overwrite the original PDF(s)."
     ),
+    workers: int = typer.Option(
+        DEFAULT_WORKERS,
+        "--workers",
+        min=1,
+        help="Number of worker processes to use when shrinking a folder.",
+    ),
+    fast: bool = typer.Option(
+        False,
+        "--fast",
+        help="Shrink with the qpdf command-line tool if it is installed (falls back to pikepdf).",
+    ),
+    level: ShrinkLevel = typer.Option(
+        ShrinkLevel.max,
+        "--level",
+        help="How hard pikepdf tries to compress: minimal, balanced, or max.",
+    ),
 ):
     """
     Shrink a PDF file or all PDFs in a folder.
+    PDFs are saved without updating XMP metadata or PDF/A markers unless the input
+    declares PDF/A conformance.
     """
     print_startup_message()
 
+    if fast and shutil.which("qpdf") is None:
+        typer.echo(
+            get_console().render_str(
+                "[yellow]qpdf was not found on PATH; ignoring --fast and shrinking with pikepdf.[/yellow]"
+            ),
+            err=True,
+        )
+        fast = False
+
     if target.is_file():
         if target.suffix.lower() != ".pdf":
             typer.echo("The specified file is not a PDF.", err=True)
             raise typer.Exit(1)
 
-        output_file = (
-            target if overwrite else target.with_stem(target.stem + "_shrunken")
-        )
-        shrink_pdf(target, output_file)
+        output_file = _shrink_one(target, overwrite, fast, level)
         typer.echo(f"Shrunken PDF saved to: {output_file}")
 
     elif target.is_dir():
-        pdf_files = list(target.glob("*.pdf"))
-        if not pdf_files:
+        pdf_iter = _iter_pdfs(target)
+        first_pdf = next(pdf_iter, None)
+        if first_pdf is None:
             typer.echo(
-                console.render_str(
+                get_console().render_str(
                     "[red]No PDF files found in the specified folder.[/red]"
                 ),
                 err=True,
             )
             raise typer.Exit(1)
 
-        for pdf_file in pdf_files:
-            output_file = (
-                pdf_file
-                if overwrite
-                else pdf_file.with_stem(pdf_file.stem + "_shrunken")
-            )
-            shrink_pdf(pdf_file, output_file)
-            typer.echo(f"Shrunken PDF saved to: {output_file}")
+        _report(
+            _run_batch(
+                partial(_shrink_one, overwrite=overwrite, fast=fast, level=level),
+                chain([first_pdf], pdf_iter),
+                workers,
+                "Shrinking PDFs",
+            ),
+            "Shrunken PDF saved to: {}",
+        )
     else:
         typer.echo(
-            console.render_str(
+            get_console().render_str(
                 "[red]The specified path is neither a file nor a folder.[/red]"
             ),
             err=True,
@@ -154,6 +729,56 @@ def shrink(
         raise typer.Exit(1)
 
 
+@app.command("shrink-merged")
+def shrink_merged(
+    target: Path = typer.Argument(..., help="Folder containing PDFs."),
+    output: Path = typer.Option(
+        None,
+        "--output",
+        help="Path of the merged PDF (default: <folder>_merged.pdf next to the folder).",
+    ),
+    level: ShrinkLevel = typer.Option(
+        ShrinkLevel.max,
+        "--level",
+        help="How hard pikepdf tries to compress: minimal, balanced, or max.",
+    ),
+):
+    """
+    Merge all PDFs in a folder into one shrunken PDF, storing images, fonts and
+    other content shared between the documents only once.
+    """
+    print_startup_message()
+
+    if not target.is_dir():
+        typer.echo(
+            get_console().render_str("[red]The specified path is not a folder.[/red]"),
+            err=True,
+        )
+        raise typer.Exit(1)
+
+    # Resolve so that e.g. "." has a name to derive the default output from
+    target = target.resolve()
+    output_file = (output or target.with_name(f"{target.name}_merged.pdf")).resolve()
+
+    # Never merge the output of a previous run into itself
+    pdf_files = sorted(
+        pdf_file for pdf_file in _iter_pdfs(target) if pdf_file != output_file
+    )
+    if not pdf_files:
+        typer.echo(
+            get_console().render_str(
+                "[red]No PDF files found in the specified folder.[/red]"
+            ),
+            err=True,
+        )
+        raise typer.Exit(1)
+
+    removed = merge_and_shrink_pdfs(pdf_files, output_file, level)
+    typer.echo(
+        f"Merged {len(pdf_files)} PDFs ({removed} duplicate streams removed) into: {output_file}"
+    )
+
+
 @app.command("watermark")
 def watermark(
     path: Path = typer.Argument(..., help="Path to a PDF file or a folder of PDFs."),
@@ -174,6 +799,12 @@ def watermark(
     ),
     fontsize: int = typer.Option(45, help="Font size for the watermark text."),
     overwrite: bool = typer.Option(False, help="Overwrite the original PDFs."),
+    workers: int = typer.Option(
+        DEFAULT_WORKERS,
+        "--workers",
+        min=1,
+        help="Number of worker processes to use when watermarking a folder.",
+    ),
 ):
     """
     Add a watermark to a PDF file or all PDFs in a folder.
@@ -181,33 +812,127 @@ def watermark(
     pdftool watermark myfile.pdf "Copyright (c) 2024 The Author, PhD" --font "Times-Roman" --fontsize 50
     pdftool watermark ./my_pdfs "Copyright (c) 2024 The Author, PhD"
     pdftool watermark myfile.pdf "Confidential" --overwrite
+    PDFs are saved without updating XMP metadata or PDF/A markers unless the input
+    declares PDF/A conformance.
     """
+    watermark_many = partial(
+        _watermark_many,
+        watermark_text=text,
+        overwrite=overwrite,
+        font=font,
+        font_size=fontsize,
+        rotation=rotation,
+        gray_level=gray,
+        alpha_level=alpha,
+    )
+
     if path.is_file():
-        add_watermark(
-            path,
-            watermark_text=text,
-            overwrite=overwrite,
-            font=font,
-            font_size=fontsize,
-            rotation=rotation,
-            gray_level=gray,
-            alpha_level=alpha,
+        _report(
+            watermark_many([path]),
+            "Watermarked PDF saved to: {}",
+            SKIPPED_WATERMARKED,
         )
     elif path.is_dir():
-        for pdf_file in path.glob("*.pdf"):
-            add_watermark(
-                pdf_file,
-                watermark_text=text,
-                overwrite=overwrite,
-                font=font,
-                font_size=fontsize,
-                rotation=rotation,
-                gray_level=gray,
-                alpha_level=alpha,
-            )
+        _report(
+            _run_batch(
+                watermark_many,
+                _grouped_by_page_size(_iter_pdfs(path)),
+                workers,
+                "Watermarking PDFs",
+                batched=True,
+            ),
+            "Watermarked PDF saved to: {}",
+            SKIPPED_WATERMARKED,
+        )
+    else:
+        typer.echo(
+            get_console().render_str(
+                "[red]The specified path is neither a file nor a folder.[/red]"
+            ),
+            err=True,
+        )
+        raise typer.Exit(1)
+
+
+@app.command("process")
+def process(
+    path: Path = typer.Argument(..., help="Path to a PDF file or a folder of PDFs."),
+    watermark_text: str = typer.Option(
+        None, "--watermark", help="Watermark text to apply."
+    ),
+    shrink: bool = typer.Option(False, "--shrink", help="Shrink the PDF(s)."),
+    level: ShrinkLevel = typer.Option(
+        ShrinkLevel.max,
+        "--level",
+        help="How hard pikepdf tries to compress: minimal, balanced, or max.",
+    ),
+    rotation: int = typer.Option(35, help="Rotation in degrees."),
+    gray: float = typer.Option(
+        0.5,
+        help="Text gray level (0.0-1.0: 0.0 is white and 1.0 is black)",
+        min=0.0,
+        max=1.0,
+    ),
+    alpha: float = typer.Option(
+        0.5, help="Text alpha level (0.0-1.0)", min=0.0, max=1.0
+    ),
+    font: AllowedFonts = typer.Option(
+        AllowedFonts.Helvetica, help="Font for the watermark text."
+    ),
+    fontsize: int = typer.Option(45, help="Font size for the watermark text."),
+    overwrite: bool = typer.Option(False, help="Overwrite the original PDFs."),
+    workers: int = typer.Option(
+        DEFAULT_WORKERS,
+        "--workers",
+        min=1,
+        help="Number of worker processes to use when processing a folder.",
+    ),
+):
+    """
+    Watermark and/or shrink a PDF file or all PDFs in a folder, reading and writing each file only once.
+    E.g.:
+    pdftool process myfile.pdf --watermark "Confidential" --shrink
+    pdftool process ./my_pdfs --watermark "Copyright (c) 2024 The Author, PhD" --shrink --level balanced
+    PDFs are saved without updating XMP metadata or PDF/A markers unless the input
+    declares PDF/A conformance.
+    """
+    if watermark_text is None and not shrink:
+        typer.echo(
+            get_console().render_str(
+                "[red]Nothing to do: pass --watermark TEXT and/or --shrink.[/red]"
+            ),
+            err=True,
+        )
+        raise typer.Exit(1)
+
+    process_one = partial(
+        _process_one,
+        overwrite=overwrite,
+        watermark_text=watermark_text,
+        shrink=shrink,
+        level=level,
+        font=font,
+        font_size=fontsize,
+        rotation=rotation,
+        gray_level=gray,
+        alpha_level=alpha,
+    )
+
+    if path.is_file():
+        output_file = process_one(path)
+        if output_file is not None:
+            typer.echo(f"Processed PDF saved to: {output_file}")
+        else:
+            typer.echo(SKIPPED_WATERMARKED.format(path.name))
+    elif path.is_dir():
+        _report(
+            _run_batch(process_one, _iter_pdfs(path), workers, "Processing PDFs"),
+            "Processed PDF saved to: {}",
+            SKIPPED_WATERMARKED,
+        )
     else:
         typer.echo(
-            console.render_str(
+            get_console().render_str(
                 "[red]The specified path is neither a file nor a folder.[/red]"
             ),
             err=True,
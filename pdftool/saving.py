@@ -0,0 +1,30 @@
+"""
+Options shared by every pikepdf save in pdftool.
+"""
+
+import pikepdf
+
+
+def is_pdfa(pdf: pikepdf.Pdf) -> bool:
+    """
+    Checks whether the PDF's XMP metadata declares PDF/A conformance.
+    """
+    if pikepdf.Name.Metadata not in pdf.Root:
+        return False
+    metadata = pdf.open_metadata(set_pikepdf_as_editor=False, update_docinfo=False)
+    return bool(metadata.pdfa_status)
+
+
+def fast_save_options(pdf: pikepdf.Pdf) -> dict:
+    """
+    Returns pdf.save options that skip the XMP metadata update and PDF/A
+    preservation work pikepdf does by default, and never compute a
+    deterministic document ID. Files that declare PDF/A conformance keep the
+    default metadata handling so they stay valid PDF/A.
+    """
+    pdfa = is_pdfa(pdf)
+    return dict(
+        fix_metadata_version=pdfa,
+        preserve_pdfa=pdfa,
+        deterministic_id=False,
+    )
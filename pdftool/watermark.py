@@ -1,21 +1,33 @@
-from enum import StrEnum  # python 3.11+
+import math
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-from reportlab.pdfgen import canvas
 from pathlib import Path
 import pikepdf
 from rich import print as rprint
 
+from pdftool.saving import fast_save_options
+from pdftool.fonts import AllowedFonts, TEXT_FONTS, encode_text, string_width
 
-class AllowedFonts(StrEnum):
-    Helvetica = "Helvetica"
-    Times_Roman = "Times-Roman"
-    Courier = "Courier"
-    Symbol = "Symbol"
-    ZapfDingbats = "ZapfDingbats"
+
+def _fmt(value: float) -> str:
+    """
+    Formats a number compactly for use in a PDF content stream.
+    """
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def _escape_pdf_string(data: bytes) -> bytes:
+    """
+    Escapes the characters that are special inside a PDF literal string.
+    """
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
 
 
 def create_watermark(
-    output_pdf: Path,
     text: str,
     page_width: float,
     page_height: float,
@@ -24,30 +36,269 @@ def create_watermark(
     rotation: int,
     gray_level: float,
     alpha_level: float,
-):
+) -> pikepdf.Pdf:
     """
     Creates a single-page watermark PDF with text displayed diagonally.
 
-    :param output_pdf: Path to save the watermark PDF.
     :param text: The text to display as a watermark.
     :param page_width: Width of the page.
     :param page_height: Height of the page.
-    :param font: Font name for the watermark text.
+    :param font: Font name for the watermark text (one of the standard PDF fonts).
     :param font_size: Font size for the watermark text.
+    :return: The watermark PDF, held in memory.
+    """
+    codes = encode_text(text, font)
+    text_width = string_width(codes, font, font_size)
+    cos = math.cos(math.radians(rotation))
+    sin = math.sin(math.radians(rotation))
+
+    # Translate to the center, rotate for diagonal placement,
+    # then draw the text centred on the origin
+    content = (
+        (
+            "q\n"
+            "/GS1 gs\n"
+            f"{_fmt(gray_level)} g\n"
+            f"1 0 0 1 {_fmt(page_width / 2)} {_fmt(page_height / 2)} cm\n"
+            f"{_fmt(cos)} {_fmt(sin)} {_fmt(-sin)} {_fmt(cos)} 0 0 cm\n"
+            f"BT /F1 {_fmt(font_size)} Tf {_fmt(-text_width / 2)} 0 Td ("
+        ).encode("ascii")
+        + _escape_pdf_string(codes)
+        + b") Tj ET\nQ\n"
+    )
+
+    font_dict = pikepdf.Dictionary(
+        Type=pikepdf.Name.Font,
+        Subtype=pikepdf.Name.Type1,
+        BaseFont=pikepdf.Name("/" + font),
+    )
+    if font in TEXT_FONTS:
+        font_dict.Encoding = pikepdf.Name.WinAnsiEncoding
+
+    pdf = pikepdf.Pdf.new()
+    pdf.add_blank_page(page_size=(page_width, page_height))
+    page = pdf.pages[0]
+    page.Resources = pikepdf.Dictionary(
+        Font=pikepdf.Dictionary(F1=font_dict),
+        ExtGState=pikepdf.Dictionary(
+            GS1=pikepdf.Dictionary(
+                Type=pikepdf.Name.ExtGState, ca=alpha_level, CA=alpha_level
+            )
+        ),
+    )
+    page.Contents = pdf.make_stream(content)
+    return pdf
+
+
+@lru_cache(maxsize=32)
+def _build_watermark_overlay(
+    text: str,
+    page_width: int,
+    page_height: int,
+    font: str,
+    font_size: int,
+    rotation: int,
+    gray_level: float,
+    alpha_level: float,
+) -> tuple[pikepdf.Pdf, pikepdf.Stream]:
+    """
+    Cached watermark PDF plus the Form XObject that draws its page. Page dimensions
+    are quantized to whole points so that files sharing a page size share one overlay.
+    The XObject belongs to the Pdf, so both are kept in the same cache entry.
+    """
+    watermark_pdf = create_watermark(
+        text=text,
+        page_width=page_width,
+        page_height=page_height,
+        font=font,
+        font_size=font_size,
+        rotation=rotation,
+        gray_level=gray_level,
+        alpha_level=alpha_level,
+    )
+    return watermark_pdf, watermark_pdf.pages[0].as_form_xobject()
+
+
+def _free_xobject_name(page: pikepdf.Page, prefix: str = "Fx") -> pikepdf.Name:
     """
-    c = canvas.Canvas(str(output_pdf), pagesize=(page_width, page_height))
-    c.setFont(font, font_size)  # Set font name and size
-    c.setFillGray(gray_level, alpha_level)  # Default: Light gray text
-    c.saveState()
+    Returns the first name of the form /<prefix>N not already used by the page's resources.
+    """
+    used = set()
+    for res_dict in page.resources.as_dict().values():
+        if isinstance(res_dict, pikepdf.Dictionary):
+            used.update(res_dict.keys())
+
+    index = 0
+    while f"/{prefix}{index}" in used:
+        index += 1
+    return pikepdf.Name(f"/{prefix}{index}")
+
+
+def _overlay_name(
+    page: pikepdf.Page, overlay_xobj: pikepdf.Stream
+) -> pikepdf.Name | None:
+    """
+    Returns the name under which the page's /XObject resources already hold
+    overlay_xobj, or None. Pages often share one /Resources dictionary, so an
+    earlier page may already have added the overlay for this one.
+    """
+    xobjects = page.resources.get("/XObject")
+    if not isinstance(xobjects, pikepdf.Dictionary):
+        return None
+    for name, xobj in xobjects.items():
+        if isinstance(xobj, pikepdf.Object) and xobj.objgen == overlay_xobj.objgen:
+            return pikepdf.Name(name)
+    return None
+
+
+def _apply_overlay(pdf: pikepdf.Pdf, overlay: pikepdf.Stream):
+    """
+    Draws the overlay Form XObject on top of every page of pdf.
+
+    The overlay is copied into pdf once and every page refers to that single
+    object, instead of page.add_overlay copying it again for each page. Pages
+    with the same geometry also share the content streams that place it.
+    """
+    overlay_xobj = pdf.copy_foreign(overlay)
+    open_stream = pdf.make_stream(b"q\n")
+
+    # Placement content streams, keyed by resource name and page geometry
+    placements: dict[tuple, pikepdf.Stream] = {}
+
+    for page in pdf.pages:
+        name = _overlay_name(page, overlay_xobj)
+        if name is None:
+            name = _free_xobject_name(page)
+            page.add_resource(overlay_xobj, pikepdf.Name.XObject, name=name)
+
+        trim_box = pikepdf.Rectangle(page.trimbox)
+        key = (
+            str(name),
+            (trim_box.llx, trim_box.lly, trim_box.urx, trim_box.ury),
+            int(page.get("/Rotate", 0)),
+        )
+        if key not in placements:
+            placement = page.calc_form_xobject_placement(overlay_xobj, name, trim_box)
+            placements[key] = pdf.make_stream(b"Q\n" + placement)
+
+        # Isolate the existing content's graphics state, then draw the overlay
+        page.contents_add(open_stream, prepend=True)
+        page.contents_add(placements[key], prepend=False)
+
+
+def _page_size(pdf: pikepdf.Pdf) -> tuple[int, int]:
+    """
+    Returns the (width, height) of the first page, quantized to whole points.
+    """
+    media_box = pdf.pages[0].MediaBox
+    return round(float(media_box[2])), round(float(media_box[3]))
+
 
-    # Translate to the center and rotate for diagonal placement
-    c.translate(page_width / 2, page_height / 2)
-    c.rotate(rotation)
+# How much of each file _probe_mediabox reads when looking for a /MediaBox
+PROBE_BYTES = 64 * 1024
 
-    # Draw the text at the center of the page
-    c.drawCentredString(0, 0, text)
-    c.restoreState()
-    c.save()
+_NUMBER = rb"\s*(-?\d*\.?\d+)"
+_MEDIABOX_RE = re.compile(rb"/MediaBox\s*\[" + _NUMBER * 4 + rb"\s*\]")
+
+
+def _probe_mediabox(path: Path) -> tuple[int, int] | None:
+    """
+    Cheaply guesses a PDF's page size by scanning its first PROBE_BYTES for a
+    literal /MediaBox array, without parsing the file. Returns the size
+    quantized like _page_size, or None if the file cannot be read or no
+    MediaBox is found (e.g. when it is inside a compressed object stream or
+    given by reference).
+    """
+    try:
+        with open(path, "rb") as f:
+            match = _MEDIABOX_RE.search(f.read(PROBE_BYTES))
+    except OSError:
+        return None  # the failure is reported when the file is watermarked
+    if match is None:
+        return None
+    return round(float(match[3])), round(float(match[4]))
+
+
+def group_by_page_size(
+    paths: Iterable[Path],
+) -> dict[tuple[int, int] | None, list[Path]]:
+    """
+    Groups PDFs by their probed page size so that files which can share a
+    watermark overlay are processed together. Probing is I/O-bound, so the
+    files are read on a thread pool. Files whose size could not be probed are
+    grouped under None. The grouping is only an ordering hint: the actual page
+    size is still read from each file when it is watermarked.
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor() as executor:
+        sizes = executor.map(_probe_mediabox, paths)
+
+    groups: dict[tuple[int, int] | None, list[Path]] = {}
+    for path, size in zip(paths, sizes):
+        groups.setdefault(size, []).append(path)
+    return groups
+
+
+def _output_path(target_pdf: Path, overwrite: bool) -> Path:
+    """
+    Determines where the watermarked version of target_pdf is saved.
+    """
+    return (
+        target_pdf
+        if overwrite
+        else target_pdf.with_stem(f"{target_pdf.stem}_watermarked")
+    )
+
+
+def _open_target(target_pdf: Path, overwrite: bool) -> pikepdf.Pdf:
+    """
+    Opens target_pdf for watermarking. Unless the file is about to be overwritten
+    (which needs a private in-memory copy), it is memory-mapped so that objects are
+    only paged in as they are read.
+    """
+    if overwrite:
+        return pikepdf.open(target_pdf, allow_overwriting_input=True)
+    return pikepdf.open(target_pdf, access_mode=pikepdf.AccessMode.mmap)
+
+
+def is_watermarked(target_pdf: Path) -> bool:
+    """
+    Checks whether target_pdf looks like the output of a previous watermark run.
+    """
+    return "_watermarked" in target_pdf.stem
+
+
+def apply_watermark(
+    pdf: pikepdf.Pdf,
+    watermark_text: str,
+    font: str = "Helvetica",
+    font_size: int = 45,
+    rotation: int = 35,
+    gray_level: float = 0.5,
+    alpha_level: float = 0.5,
+):
+    """
+    Adds a diagonal watermark to each page of an already opened PDF, without saving it.
+
+    Takes the same styling parameters as add_watermark.
+    """
+    # Get page dimensions from the first page
+    page_width, page_height = _page_size(pdf)
+
+    # Build (or reuse) the in-memory watermark
+    _, overlay = _build_watermark_overlay(
+        watermark_text,
+        page_width,
+        page_height,
+        font,
+        font_size,
+        rotation,
+        gray_level,
+        alpha_level,
+    )
+
+    # Apply watermark to all pages
+    _apply_overlay(pdf, overlay)
 
 
 def add_watermark(
@@ -59,7 +310,7 @@ def add_watermark(
     rotation: int = 35,
     gray_level: float = 0.5,
     alpha_level: float = 0.5,
-):
+) -> Path | None:
     """
     Adds a diagonal watermark to each page of the target PDF.
 
@@ -68,35 +319,21 @@ def add_watermark(
     :param overwrite: Whether to overwrite the input PDF. Default is False.
     :param font: Font name for the watermark text. Default is 'Helvetica'.
     :param font_size: Font size for the watermark text. Default is 40.
+    :return: Path to the watermarked PDF, or None if the file was skipped.
     """
-    if "_watermarked" in target_pdf.stem:
+    if is_watermarked(target_pdf):
         rprint(
             f"[yellow]The file '{target_pdf.name}' appears to already be watermarked. Aborting.[/yellow]"
         )
-        return
+        return None
 
     # Determine the output path
-    output_pdf = (
-        target_pdf
-        if overwrite
-        else target_pdf.with_stem(f"{target_pdf.stem}_watermarked")
-    )
+    output_pdf = _output_path(target_pdf, overwrite)
 
-    with pikepdf.open(target_pdf, allow_overwriting_input=True) as pdf:
-        # Get page dimensions from the first page
-        first_page = pdf.pages[0]
-        page_width = first_page.MediaBox[2]  # Page width
-        page_height = first_page.MediaBox[3]  # Page height
-
-        # Generate a temporary watermark file name based on the original file name
-        watermark_pdf_path = target_pdf.with_stem(f"{target_pdf.stem}_temp")
-
-        # Create the temporary watermark PDF
-        create_watermark(
-            output_pdf=watermark_pdf_path,
-            text=watermark_text,
-            page_width=page_width,
-            page_height=page_height,
+    with _open_target(target_pdf, overwrite) as pdf:
+        apply_watermark(
+            pdf,
+            watermark_text,
             font=font,
             font_size=font_size,
             rotation=rotation,
@@ -104,34 +341,66 @@ def add_watermark(
             alpha_level=alpha_level,
         )
 
-        # Open the watermark PDF
-        with pikepdf.open(
-            watermark_pdf_path, allow_overwriting_input=True
-        ) as watermark_pdf:
-            watermark_page = watermark_pdf.pages[0]
+        # Save the watermarked PDF
+        pdf.save(output_pdf, **fast_save_options(pdf))
 
-            # Apply watermark to all pages
-            for page in pdf.pages:
-                page.add_overlay(watermark_page)
+    return output_pdf
 
-        # Save the watermarked PDF
-        pdf.save(output_pdf)
 
-        # Clean up temporary watermark PDF
-        watermark_pdf_path.unlink()
+def add_watermark_batch(
+    paths: Iterable[Path],
+    watermark_text: str,
+    overwrite: bool = False,
+    font: str = "Helvetica",
+    font_size: int = 45,
+    rotation: int = 35,
+    gray_level: float = 0.5,
+    alpha_level: float = 0.5,
+) -> Iterator[tuple[Path, Path | None]]:
+    """
+    Adds a diagonal watermark to each PDF in paths, building each distinct
+    watermark overlay only once for the whole batch.
+
+    Takes the same styling parameters as add_watermark.
+    :return: Yields (target_pdf, output_pdf) pairs; output_pdf is None if the file was skipped.
+    """
+    # Watermark PDFs and their overlays, keyed by quantized page size
+    overlays: dict[tuple[int, int], tuple[pikepdf.Pdf, pikepdf.Stream]] = {}
+
+    for target_pdf in paths:
+        if is_watermarked(target_pdf):
+            yield target_pdf, None
+            continue
+
+        output_pdf = _output_path(target_pdf, overwrite)
+
+        with _open_target(target_pdf, overwrite) as pdf:
+            page_size = _page_size(pdf)
+            if page_size not in overlays:
+                overlays[page_size] = _build_watermark_overlay(
+                    watermark_text,
+                    *page_size,
+                    font,
+                    font_size,
+                    rotation,
+                    gray_level,
+                    alpha_level,
+                )
+
+            _apply_overlay(pdf, overlays[page_size][1])
+
+            pdf.save(output_pdf, **fast_save_options(pdf))
 
-    rprint(f"Watermarked PDF saved to: {output_pdf}")
+        yield target_pdf, output_pdf
 
 
 if __name__ == "__main__":
     # Example Usage
     input_pdf = Path("input.pdf")
-    output_pdf = Path("output_watermarked.pdf")
     watermark_text = "Copyright (c) 2024 The Author, PhD"
 
     add_watermark(
         target_pdf=input_pdf,
-        output_pdf=output_pdf,
         watermark_text=watermark_text,
         font="Times-Roman",  # Custom font name
         font_size=50,  # Custom font size